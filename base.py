@@ -12,7 +12,7 @@ def get_configdict ():#
                 OO0O0O0O0O0OO00O0 =str (OO0O0O0O0O0OO00O0 ).replace ('\n','').replace ('\'','',-1 ).replace ('\"','',-1 )#
                 if OO0O0O0O0O0OO00O0 ==''or OO0O0O0O0O0OO00O0 is None :#
                     continue #
-                if OO0O0O0O0O0OO00O0 .strip ()[0 ]=='#
+                if OO0O0O0O0O0OO00O0 .strip ()[0 ]=='#':#
                     continue #
                 if 'export'in OO0O0O0O0O0OO00O0 .strip ():#
                     OO0O0O0O0O0OO00O0 =OO0O0O0O0O0OO00O0 .replace ('export','',-1 )#
@@ -31,7 +31,7 @@ def get_configdict ():#
                 OO0O0O0O0O0OO00O0 =str (OO0O0O0O0O0OO00O0 ).replace ('\n','').replace ('\'','',-1 ).replace ('\"','',-1 )#
                 if OO0O0O0O0O0OO00O0 ==''or OO0O0O0O0O0OO00O0 is None :#
                     continue #
-                if OO0O0O0O0O0OO00O0 .strip ()[0 ]=='#
+                if OO0O0O0O0O0OO00O0 .strip ()[0 ]=='#':#
                     continue #
                 if 'export'in OO0O0O0O0O0OO00O0 .strip ():#
                     OO0O0O0O0O0OO00O0 =OO0O0O0O0O0OO00O0 .replace ('export','',-1 )#
@@ -1,12 +1,18 @@
 ﻿import json
 import os
 import time
-import requests
-import subprocess
 import logging
 import sys
 from urllib.parse import urlparse
 
+import findings_db
+import scan_journal
+import sqlmapapi_client
+from scan_cache import ScanCache, signature_from_url
+from scan_journal import ScanJournal, request_key
+from scan_timing import PhaseTimer, format_seconds
+from sqlmapapi_supervisor import ApiSupervisor
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -25,34 +31,45 @@ SERVER_PORT = 8775
 URLS_FILE = "ltgs-urls.txt"
 HEADERS_FILE = "headers.json"
 RESULTS_FILE = "injection_results.txt"
+RESULTS_JSONL = "injection_results.jsonl"  # 每发现一个注入点立即追加一行(带轮次, 报告只渲染当前一轮)
+FINDINGS_DB = findings_db.DEFAULT_DB  # 跨多次运行累积的注入结果库
+CACHE_FILE = "sqlmap_batch_cache.db"  # 跨运行扫描缓存
+CACHE_TTL = 30 * 86400  # 同一接口多久内不重复扫描(秒), 加 --force 参数强制重扫
+CACHE_MAX_ENTRIES = 100000
+FSYNC_EVERY = 10  # 每写入N条记录fsync一次
+FSYNC_INTERVAL = 30  # 距上次fsync超过N秒也会fsync
+JOURNAL_FILE = "sqlmap_batch_journal.db"  # 断点续扫日志
+TIMING_CSV = "sqlmap_batch_timing.csv"  # 每个URL各阶段耗时
+TIMING_JSON = "sqlmap_batch_timing.json"  # 耗时汇总及明细
 MAX_RETRIES = 3
 TIMEOUT = 30  # 超时时间(秒)
+SCAN_TIMEOUT = 3600  # 单个URL扫描最长等待时间(秒)
+POLL_MIN = 1  # 状态轮询首次间隔(秒)
+POLL_MAX = 15  # 状态轮询间隔上限(秒), 中间按1.5倍退避
+API_START_TIMEOUT = 30  # 等待sqlmapapi端口可连接的最长时间(秒)
+API_RESTART_WAIT = 120  # 处理URL前等待sqlmapapi后台重启的最长时间(秒)
+
+session = sqlmapapi_client.make_session()
+timer = PhaseTimer()
 
 def start_sqlmap_api():
-    """启动sqlmapapi服务"""
+    """启动sqlmapapi服务(已在运行则复用), 由守护线程负责监视和自动重启"""
     try:
         logger.info("正在启动sqlmapapi服务...")
-        process = subprocess.Popen(["python", SQLMAP_API_PATH, "-s", SERVER_HOST, "-p", str(SERVER_PORT)],
-                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        time.sleep(5)  # 等待服务启动
-        return process
+        api = ApiSupervisor([sys.executable, SQLMAP_API_PATH, "-s", "-H", SERVER_HOST, "-p", str(SERVER_PORT)],
+                            SERVER_HOST, SERVER_PORT, start_timeout=API_START_TIMEOUT, log=logger.info,
+                            on_restart=lambda seconds: timer.add("restart", seconds))
+        if api.start():
+            return api
     except Exception as e:
         logger.error(f"启动sqlmapapi服务失败: {e}")
-        return None
-
-def check_api_status():
-    """检查sqlmapapi服务是否在运行"""
-    try:
-        response = requests.get(f"http://{SERVER_HOST}:{SERVER_PORT}/", timeout=TIMEOUT)
-        return response.status_code == 200
-    except:
-        return False
+    return None
 
 def create_new_task():
     """创建新的扫描任务"""
     for _ in range(MAX_RETRIES):
         try:
-            response = requests.get(f"http://{SERVER_HOST}:{SERVER_PORT}/task/new", timeout=TIMEOUT)
+            response = session.get(f"http://{SERVER_HOST}:{SERVER_PORT}/task/new", timeout=TIMEOUT)
             if response.status_code == 200:
                 task_data = response.json()
                 if task_data["success"]:
@@ -66,7 +83,7 @@ def create_new_task():
 def delete_task(task_id):
     """删除任务"""
     try:
-        requests.get(f"http://{SERVER_HOST}:{SERVER_PORT}/task/{task_id}/delete", timeout=TIMEOUT)
+        session.get(f"http://{SERVER_HOST}:{SERVER_PORT}/task/{task_id}/delete", timeout=TIMEOUT)
     except:
         pass
 
@@ -90,7 +107,7 @@ def start_scan(task_id, url, headers):
     
     for _ in range(MAX_RETRIES):
         try:
-            response = requests.post(
+            response = session.post(
                 f"http://{SERVER_HOST}:{SERVER_PORT}/scan/{task_id}/start",
                 json=options,
                 timeout=TIMEOUT
@@ -107,7 +124,7 @@ def get_scan_status(task_id):
     """获取扫描状态"""
     for _ in range(MAX_RETRIES):
         try:
-            response = requests.get(
+            response = session.get(
                 f"http://{SERVER_HOST}:{SERVER_PORT}/scan/{task_id}/status",
                 timeout=TIMEOUT
             )
@@ -121,7 +138,7 @@ def get_scan_data(task_id):
     """获取扫描结果数据"""
     for _ in range(MAX_RETRIES):
         try:
-            response = requests.get(
+            response = session.get(
                 f"http://{SERVER_HOST}:{SERVER_PORT}/scan/{task_id}/data",
                 timeout=TIMEOUT
             )
@@ -131,97 +148,78 @@ def get_scan_data(task_id):
             time.sleep(2)
     return {"data": []}
 
-def extract_vulnerable_info(data):
-    """提取注入点信息和数据库信息"""
-    result = {
-        "vulnerable": False,
-        "parameter": "",
-        "place": "",
-        "payload": "",
-        "databases": [],
-        "tables": {}
-    }
-    
-    if not data or "data" not in data or not data["data"]:
-        return result
-    
-    for item in data["data"]:
-        # 检查是否存在注入点
-        if "type" in item and item["type"] == 1:  # type 1表示注入点
-            if "value" in item:
-                result["vulnerable"] = True
-                for detail in item["value"]:
-                    if "parameter" in detail:
-                        result["parameter"] = detail.get("parameter", "")
-                    if "place" in detail:
-                        result["place"] = detail.get("place", "")
-                    if "payload" in detail:
-                        result["payload"] = detail.get("payload", "")
-        
-        # 提取数据库信息
-        if "type" in item and item["type"] == 2:  # type 2表示数据库信息
-            if "value" in item and isinstance(item["value"], list):
-                result["databases"] = item["value"]
-        
-        # 提取表信息
-        if "type" in item and item["type"] == 3:  # type 3表示表信息
-            if "value" in item and isinstance(item["value"], dict):
-                result["tables"] = item["value"]
-    
-    return result
+def extract_vulnerable_info(data, url):
+    """提取注入点信息和数据库信息, 每个注入点一条标准化记录(见 findings_db.normalize_findings)"""
+    return findings_db.normalize_findings(data, url)
 
-def process_url(url, headers):
-    """处理单个URL"""
+def wait_scan(task_id, url):
+    """等待扫描完成: 自适应轮询, 超时或状态未知时放弃, 返回日志状态"""
+    deadline = time.monotonic() + SCAN_TIMEOUT
+    intervals = sqlmapapi_client.poll_intervals(POLL_MIN, POLL_MAX)
+    while True:
+        status_data = get_scan_status(task_id)
+        if status_data.get("status") == "terminated":
+            logger.info(f"扫描已完成, 任务ID: {task_id}, URL: {url}")
+            return scan_journal.DONE
+        elif status_data.get("status") == "running":
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"扫描超时, 任务ID: {task_id}, URL: {url}")
+                return scan_journal.TIMEOUT
+            logger.info(f"扫描中... 任务ID: {task_id}, URL: {url}")
+            time.sleep(min(next(intervals), remaining))
+        else:
+            # get_scan_status 已重试 MAX_RETRIES 次, 不再无限等待
+            logger.warning(f"未知状态: {status_data.get('status')}, 任务ID: {task_id}, URL: {url}")
+            return scan_journal.ERROR
+
+def process_url(url, headers, journal=None, key=None):
+    """处理单个URL，返回 (日志状态, 注入点记录列表)"""
     logger.info(f"开始处理URL: {url}")
     
-    task_id = create_new_task()
+    with timer.phase("new_task"):
+        task_id = create_new_task()
     if not task_id:
         logger.error(f"为URL创建任务失败: {url}")
-        return None
+        return scan_journal.ERROR, []
     
     logger.info(f"已创建任务ID: {task_id} 用于URL: {url}")
+    if journal:
+        journal.mark(key, scan_journal.RUNNING, task_id)
     
     # 开始扫描
-    if not start_scan(task_id, url, headers):
+    with timer.phase("start_scan"):
+        started = start_scan(task_id, url, headers)
+    if not started:
         logger.error(f"启动扫描失败, 任务ID: {task_id}, URL: {url}")
-        delete_task(task_id)
-        return None
+        with timer.phase("delete_task"):
+            delete_task(task_id)
+        return scan_journal.ERROR, []
     
     logger.info(f"已启动扫描, 任务ID: {task_id}, URL: {url}")
     
-    # 等待扫描完成
-    while True:
-        status_data = get_scan_status(task_id)
-        if status_data.get("status") == "terminated":
-            logger.info(f"扫描已完成, 任务ID: {task_id}, URL: {url}")
-            break
-        elif status_data.get("status") == "running":
-            logger.info(f"扫描中... 任务ID: {task_id}, URL: {url}")
-            time.sleep(10)
-        else:
-            logger.warning(f"未知状态: {status_data.get('status')}, 任务ID: {task_id}, URL: {url}")
-            time.sleep(5)
+    with timer.phase("wait_task"):
+        state = wait_scan(task_id, url)
+    if state != scan_journal.DONE:
+        with timer.phase("delete_task"):
+            delete_task(task_id)
+        return state, []
     
     # 获取扫描结果
-    scan_data = get_scan_data(task_id)
-    result = extract_vulnerable_info(scan_data)
+    with timer.phase("get_data"):
+        scan_data = get_scan_data(task_id)
+    records = extract_vulnerable_info(scan_data, url)
     
     # 删除任务
-    delete_task(task_id)
+    with timer.phase("delete_task"):
+        delete_task(task_id)
     
-    if result["vulnerable"]:
-        logger.info(f"发现注入点! URL: {url}, 参数: {result['parameter']}")
-        return {
-            "url": url,
-            "parameter": result["parameter"],
-            "place": result["place"],
-            "payload": result["payload"],
-            "databases": result["databases"],
-            "tables": result["tables"]
-        }
+    if records:
+        for record in records:
+            logger.info(f"发现注入点! URL: {url}, 参数: {record['parameter']}")
     else:
         logger.info(f"URL未发现注入点: {url}")
-        return None
+    return scan_journal.DONE, records
 
 def load_headers():
     """从文件加载请求头"""
@@ -247,37 +245,100 @@ def load_urls():
         logger.error(f"加载URL列表失败: {e}")
         return []
 
+class ResultWriter:
+    """以JSONL格式逐条追加注入结果, 批量fsync"""
+    
+    def __init__(self, path=RESULTS_JSONL, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL):
+        self.file = open(path, 'a', encoding='utf-8')
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+    
+    def write(self, result):
+        self.file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        # flush后进程被杀也不会丢失, fsync防止系统崩溃丢失
+        self.file.flush()
+        self.count += 1
+        self.unsynced += 1
+        if self.unsynced >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.sync()
+    
+    def sync(self):
+        if self.unsynced:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+        self.last_sync = time.monotonic()
+    
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+def load_results(path=RESULTS_JSONL, scan_round=None):
+    """逐行读取JSONL结果, 跳过被中断写坏的行和重复的注入点; 指定scan_round时只读该轮的结果"""
+    if not os.path.exists(path):
+        return
+    seen = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                result = json.loads(line)
+            except ValueError:
+                logger.warning(f"跳过损坏的结果行: {line[:80]}")
+                continue
+            if scan_round is not None and result.get('round') != scan_round:
+                continue
+            # 写入结果后、标记完成前被杀会重扫该URL, 同一请求key的同一注入点只保留一条
+            if result.get('key'):
+                ident = (result['key'], result.get('parameter'), result.get('place'))
+                if ident in seen:
+                    continue
+                seen.add(ident)
+            yield result
+
 def save_results(results):
-    """保存注入结果到文件"""
+    """把注入结果渲染成可读报告, 兼容旧版记录的 url/databases 字段, 返回注入点数量"""
     with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
         f.write("SQL注入扫描结果\n")
         f.write("=" * 80 + "\n\n")
         
-        if not results:
-            f.write("未发现注入点\n")
-            return
-        
+        i = 0
         for i, result in enumerate(results, 1):
             f.write(f"[漏洞 #{i}]\n")
-            f.write(f"URL: {result['url']}\n")
-            f.write(f"参数: {result['parameter']}\n")
-            f.write(f"位置: {result['place']}\n")
-            f.write(f"Payload: {result['payload']}\n")
+            f.write(f"URL: {result.get('target') or result.get('url', '')}\n")
+            f.write(f"参数: {result.get('parameter', '')}\n")
+            f.write(f"位置: {result.get('place', '')}\n")
+            f.write(f"Payload: {result.get('payload', '')}\n")
             
             f.write("\n数据库列表:\n")
-            for db in result['databases']:
+            for db in result.get('dbs') or result.get('databases') or []:
                 f.write(f"- {db}\n")
             
             f.write("\n表信息:\n")
-            for db, tables in result['tables'].items():
+            for db, tables in (result.get('tables') or {}).items():
                 f.write(f"数据库 '{db}' 中的表:\n")
                 for table in tables:
                     f.write(f"  - {table}\n")
             
             f.write("\n" + "=" * 80 + "\n\n")
+        
+        if not i:
+            f.write("未发现注入点\n")
+    return i
 
 def main():
     """主函数"""
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        # 只查看断点续扫进度，不扫描
+        scan_journal.print_status(JOURNAL_FILE)
+        return
+    
     logger.info("开始批量SQL注入扫描")
     
     # 加载URL和headers
@@ -289,58 +350,122 @@ def main():
         return
     
     logger.info(f"已加载 {len(urls)} 个URL")
+    force = "--force" in sys.argv[1:]
+    
+    # 断点续扫: 跳过已完成的URL, 上次中断的URL重新排队
+    journal = ScanJournal(JOURNAL_FILE)
+    requeued = journal.recover()
+    if requeued:
+        logger.info(f"{requeued} 个URL上次被中断,重新排队")
+    keys = [request_key(url) for url in urls]
+    for key, url in zip(keys, urls):
+        journal.add(key, url)
+    if force or journal.round_complete():
+        # 上一轮已跑完(或强制重扫): 开始新一轮, 是否跳过交给扫描缓存判断
+        journal.begin_round(keys)
+        logger.info(f"开始第 {journal.round} 轮扫描" + (",忽略缓存" if force else ""))
+    else:
+        logger.info(f"第 {journal.round} 轮上次被中断,继续扫描")
+    scan_round = journal.round
+    pending = sum(1 for key in keys if not journal.is_finished(key))
+    logger.info(f"待扫描 {pending} 个URL")
     
     # 启动sqlmapapi服务
-    api_process = None
-    if not check_api_status():
-        api_process = start_sqlmap_api()
-        if not api_process:
-            logger.error("无法启动sqlmapapi服务,退出")
-            return
+    api = start_sqlmap_api()
+    if not api:
+        logger.error("无法启动sqlmapapi服务,退出")
+        journal.close()
+        return
     
-    # 存储结果
-    results = []
+    # 结果逐条写入JSONL和结果库, 结束后再渲染报告
+    writer = ResultWriter()
+    findings = findings_db.FindingsDB(FINDINGS_DB, script="batch_sqlmap")
+    cache = ScanCache(CACHE_FILE, CACHE_TTL, CACHE_MAX_ENTRIES)
+    content_type = ""
+    if isinstance(headers, dict):
+        content_type = next((v for k, v in headers.items() if k.lower() == "content-type"), "")
     
+    remaining = pending
     try:
         # 处理每个URL
-        for i, url in enumerate(urls, 1):
+        for i, (key, url) in enumerate(zip(keys, urls), 1):
+            if journal.is_finished(key):
+                continue
+            remaining -= 1
+            # 同一接口(方法/主机/路径/参数名/Content-Type)近期已扫描过则跳过
+            sig, desc = signature_from_url(url, content_type=content_type)
+            if not force and cache.fresh(sig):
+                logger.info(f"跳过URL [{i}/{len(urls)}]: {desc} 近期已扫描")
+                journal.mark(key, scan_journal.SKIPPED)
+                continue
             logger.info(f"处理URL [{i}/{len(urls)}]: {url}")
+            timer.begin(url)
             
-            # 检查API服务是否正常
-            if not check_api_status():
-                logger.warning("sqlmapapi服务不可用,尝试重启...")
-                if api_process:
-                    try:
-                        api_process.terminate()
-                        time.sleep(2)
-                    except:
-                        pass
-                api_process = start_sqlmap_api()
-                if not api_process:
-                    logger.error("重启sqlmapapi服务失败,跳过当前URL")
-                    continue
-                logger.info("sqlmapapi服务已重启")
+            # API服务正常时立即返回, 只有在后台重启期间才会等待
+            if not api.is_ready():
+                logger.warning("sqlmapapi服务不可用,等待重启...")
+                with timer.phase("api_wait"):
+                    ready = api.wait_ready(API_RESTART_WAIT)
+                if ready:
+                    logger.info("sqlmapapi服务已重启")
+            else:
+                ready = True
+            
+            if ready:
+                # 处理URL
+                restarts = api.restarts
+                state, records = process_url(url, headers, journal, key)
+                if state == scan_journal.ERROR and api.restarts == restarts:
+                    # 建任务/下发/查状态失败且进程没有退出: 服务可能已卡死, 重启后后续URL不再白白重试
+                    logger.warning("sqlmapapi服务异常,尝试重启")
+                    api.restart()
+            else:
+                logger.error("sqlmapapi服务仍不可用,跳过当前URL")
+                state, records = scan_journal.ERROR, []
+            # 先落盘结果再标记完成, 中途被杀也不会丢失已发现的注入点
+            # 记录带上请求key和轮次, 写入后标记前被杀导致同一轮重扫时据此去重
+            for record in records:
+                record['key'] = key
+                record['round'] = scan_round
+                writer.write(record)
+                findings.add(record)
+            journal.mark(key, state)
+            cache.record(sig, desc, state)
+            timer.end(state)
             
-            # 处理URL
-            result = process_url(url, headers)
-            if result:
-                results.append(result)
+            eta = timer.eta(remaining)
+            if remaining and eta is not None:
+                logger.info(f"剩余 {remaining} 个URL, 预计还需 {format_seconds(eta)}")
+        # 整轮跑完(出错的URL留到下一轮重试), 下次运行开始新一轮
+        journal.complete_round()
     
     except KeyboardInterrupt:
         logger.info("用户中断执行")
     except Exception as e:
         logger.error(f"执行过程中发生错误: {e}")
     finally:
-        # 保存结果
-        save_results(results)
-        logger.info(f"扫描结果已保存至 {RESULTS_FILE}")
+        # 先关闭sqlmapapi服务(复用的外部服务不会被关闭)和各个文件, 渲染报告出错也不会留下孤儿进程
+        logger.info("关闭sqlmapapi服务")
+        api.stop()
+        writer.close()
+        findings.close()
+        cache.close()
+        journal.close()
+        
+        # 保存结果(只渲染本轮, 断点续扫时包含本轮之前几次运行发现的注入点)
+        found = writer.count
+        try:
+            found = save_results(load_results(scan_round=scan_round))
+            logger.info(f"扫描结果已保存至 {RESULTS_FILE} ({RESULTS_JSONL})")
+        except Exception as e:
+            logger.error(f"生成结果报告失败: {e}, 原始结果见 {RESULTS_JSONL}")
         
-        # 关闭sqlmapapi服务
-        if api_process:
-            logger.info("关闭sqlmapapi服务")
-            api_process.terminate()
+        # 分阶段耗时统计
+        logger.info("耗时统计:\n" + timer.summary())
+        timer.export(TIMING_CSV)
+        timer.export(TIMING_JSON)
     
-    logger.info(f"扫描完成,共发现 {len(results)} 个注入点")
+    logger.info(f"扫描完成,第 {scan_round} 轮共发现 {found} 个注入点(本次运行新增 {writer.count} 个)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,66 +4,66 @@
 批量调用 sqlmapapi，对 burp2sqlmap.py 生成的 ltgs-urls_ok.txt 进行注入检测
 1. 读取完整 HTTP 报文（含 headers/cookies/body）
 2. 逐段提交给 sqlmapapi
-3. 发现注入后记录 url、参数、dbs、tables
+3. 发现注入后记录 url、参数、位置、payload、dbs、tables（injection_result.txt 及结果库 sqlmap_findings.db）
 4. 全程无人值守：超时保护、sqlmapapi 断线自动重启
+5. 断点续扫：每条请求的状态记录在 scan_journal.db，重启后跳过已完成的请求
+6. 分阶段计时：运行中估算剩余时间，结束时输出各阶段耗时分位数并导出 scan_timing.csv/json
+7. 跨运行缓存：同一接口（方法/主机/路径/参数名/Content-Type）在 CACHE_TTL 内扫过则跳过
 用法：
     python batch_sqlmapapi.py ltgs-urls_ok.txt
+    python batch_sqlmapapi.py ltgs-urls_ok.txt --force   # 忽略缓存全部重扫
+    python batch_sqlmapapi.py status        # 只查看进度，不扫描
 """
 
-import os
 import sys
 import json
 import time
-import signal
-import subprocess
 import requests
 from pathlib import Path
 
+import findings_db
+import scan_journal
+import sqlmapapi_client
+from scan_cache import ScanCache, signature_from_raw
+from scan_journal import ScanJournal, request_key
+from scan_timing import PhaseTimer, format_seconds
+from sqlmapapi_supervisor import ApiSupervisor
+
 # ========== 全局配置 ==========
 SQLMAP_DIR = Path(r"C:\Users\test\Desktop\sqlmap")
 SQLMAPAPI_PY = SQLMAP_DIR / "sqlmapapi.py"
 RESULT_FILE = Path("injection_result.txt")
+FINDINGS_DB = Path(findings_db.DEFAULT_DB)
+JOURNAL_FILE = Path("scan_journal.db")
+CACHE_FILE = Path("scan_cache.db")
+CACHE_TTL = 30 * 86400      # 同一接口多久内不重复扫描（秒）
+CACHE_MAX_ENTRIES = 100000
+TIMING_CSV = Path("scan_timing.csv")
+TIMING_JSON = Path("scan_timing.json")
 
 API_HOST = "127.0.0.1"
 API_PORT = 8775
 API_BASE = f"http://{API_HOST}:{API_PORT}"
 
 TASK_TIMEOUT = 300          # 单个任务最大运行时间（秒）
-POLL_INTERVAL = 3
+POLL_MIN = 0.5              # 状态轮询：首次间隔（秒）
+POLL_MAX = 10               # 状态轮询：间隔上限（秒），中间按 1.5 倍退避
 API_START_MAX_WAIT = 30
+API_RESTART_MAX_WAIT = 120  # 检测前等待 sqlmapapi 后台重启的最长时间（秒）
 # ==============================
 
+SESSION = sqlmapapi_client.make_session()
+TIMER = PhaseTimer()
+
 # ---------- 工具函数 ----------
 def log(msg):
     print(f"[{time.strftime('%H:%M:%S')}] {msg}")
 
-def kill_proc(proc):
-    if proc and proc.poll() is None:
-        proc.send_signal(signal.CTRL_BREAK_EVENT if os.name == 'nt' else signal.SIGTERM)
-        proc.wait()
-
-def start_sqlmapapi():
+def make_supervisor():
     cmd = [sys.executable, str(SQLMAPAPI_PY), "-s", "-H", API_HOST, "-p", str(API_PORT)]
-    proc = subprocess.Popen(cmd, cwd=str(SQLMAP_DIR),
-                            stdout=subprocess.DEVNULL,
-                            stderr=subprocess.DEVNULL,
-                            creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0)
-    for _ in range(API_START_MAX_WAIT):
-        try:
-            if requests.get(f"{API_BASE}/admin/0/list", timeout=5).status_code == 200:
-                log("sqlmapapi 已就绪")
-                return proc
-        except requests.RequestException:
-            pass
-        time.sleep(1)
-    log("sqlmapapi 启动失败")
-    kill_proc(proc)
-    return None
-
-def restart_sqlmapapi(proc):
-    log("检测到 sqlmapapi 异常，准备重启...")
-    kill_proc(proc)
-    return start_sqlmapapi()
+    return ApiSupervisor(cmd, API_HOST, API_PORT, cwd=str(SQLMAP_DIR),
+                         start_timeout=API_START_MAX_WAIT, log=log,
+                         on_restart=lambda seconds: TIMER.add("restart", seconds))
 
 def read_requests(file_path):
     """读取 burp2sqlmap 生成的文件，按 ==== 分割成 list[bytes]"""
@@ -72,14 +72,35 @@ def read_requests(file_path):
     # 去掉空块
     return [b for b in blocks if b.strip()]
 
+def request_line(raw_http):
+    """报文首行，如 GET /index.php?id=1 HTTP/1.1"""
+    return raw_http.split(b"\n", 1)[0].decode("utf-8", errors="ignore").strip()
+
+def request_url(raw_http):
+    """由 Host 头和首行拼出 URL，sqlmap 未返回目标时作为记录的 target"""
+    lines = raw_http.decode("utf-8", errors="ignore").split("\n")
+    parts = lines[0].split()
+    path = parts[1] if len(parts) > 1 else "/"
+    for line in lines[1:]:
+        if line.lower().startswith("host:"):
+            return f"http://{line.split(':', 1)[1].strip()}{path}"
+    return path
+
 def new_task():
-    r = requests.get(f"{API_BASE}/task/new")
+    try:
+        r = SESSION.get(f"{API_BASE}/task/new", timeout=10)
+    except requests.RequestException:
+        return None
     if r.status_code == 200 and r.json().get("success"):
         return r.json()["taskid"]
     return None
 
 def delete_task(taskid):
-    requests.get(f"{API_BASE}/task/{taskid}/delete")
+    # sqlmapapi 可能正在后台重启，删除失败不影响后续检测
+    try:
+        SESSION.get(f"{API_BASE}/task/{taskid}/delete", timeout=10)
+    except requests.RequestException:
+        pass
 
 def start_scan(taskid, raw_http):
     """把完整 HTTP 报文直接发给 sqlmapapi"""
@@ -92,56 +113,117 @@ def start_scan(taskid, raw_http):
         "threads": 4,
         "timeout": TASK_TIMEOUT
     }
-    r = requests.post(f"{API_BASE}/scan/{taskid}/start", data=data, files=files, timeout=10)
+    r = SESSION.post(f"{API_BASE}/scan/{taskid}/start", data=data, files=files, timeout=10)
     return r.status_code == 200 and r.json().get("success")
 
 def wait_task(taskid):
-    start = time.time()
-    while time.time() - start < TASK_TIMEOUT:
+    deadline = time.monotonic() + TASK_TIMEOUT
+    intervals = sqlmapapi_client.poll_intervals(POLL_MIN, POLL_MAX)
+    while True:
         try:
-            r = requests.get(f"{API_BASE}/scan/{taskid}/status", timeout=5)
+            r = SESSION.get(f"{API_BASE}/scan/{taskid}/status", timeout=5)
             if r.status_code != 200:
                 return "error"
             status = r.json()["status"]
             if status in ("terminated", "finished"):
                 return "done"
-            if status == "running":
-                time.sleep(POLL_INTERVAL)
-                continue
-            return "error"
-        except requests.RequestException:
+            if status != "running":
+                return "error"
+        except (requests.RequestException, ValueError, KeyError):
             return "error"
-    return "timeout"
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return "timeout"
+        time.sleep(min(next(intervals), remaining))
 
-def get_injection_summary(taskid):
+def get_injection_summary(taskid, target=""):
+    """返回每个注入点一条的标准化记录，无注入或出错返回 []"""
     try:
-        data = requests.get(f"{API_BASE}/scan/{taskid}/data", timeout=10).json()
-        if not data.get("data"):
-            return None
-        # 取第一条注入记录
-        inj = data["data"][0]
-        url = inj.get("value", {}).get("url", "")
-        parameter = inj.get("value", {}).get("parameter", "")
-        dbs, tables = [], []
-        for item in data.get("data", []):
-            if item.get("type") == 1:
-                dbs = item.get("value", [])
-            elif item.get("type") == 2:
-                tables = item.get("value", [])
-        return {"url": url, "parameter": parameter, "dbs": dbs, "tables": tables}
+        data = SESSION.get(f"{API_BASE}/scan/{taskid}/data", timeout=10).json()
+        return findings_db.normalize_findings(data, target)
     except Exception:
-        return None
+        return []
 
 def save_result(summary):
     with open(RESULT_FILE, "a", encoding="utf-8") as f:
         f.write(json.dumps(summary, ensure_ascii=False) + "\n")
 
 # ---------- 主流程 ----------
+def scan_request(api, journal, findings, key, raw):
+    """检测单条请求，返回日志状态"""
+    # 只有 api 正在重启时才等待并计时，与 batch_sqlmap.py 的 api_wait 统计口径一致
+    if not api.is_ready():
+        log("sqlmapapi 不可用，等待重启...")
+        with TIMER.phase("api_wait"):
+            ready = api.wait_ready(API_RESTART_MAX_WAIT)
+        if not ready:
+            log("sqlmapapi 长时间不可用，跳过")
+            return scan_journal.ERROR
+    restarts = api.restarts
+
+    def restart_if_hung(reason):
+        # 检测期间进程已退出并被后台线程重新拉起时不再重启，避免杀掉刚拉起的新进程
+        if api.restarts == restarts:
+            log(f"{reason}，尝试重启 api")
+            api.restart()
+        else:
+            log(f"{reason}，api 已重启")
+
+    with TIMER.phase("new_task"):
+        taskid = new_task()
+    if not taskid:
+        restart_if_hung("创建任务失败")
+        return scan_journal.ERROR
+
+    journal.mark(key, scan_journal.RUNNING, taskid)
+    with TIMER.phase("start_scan"):
+        try:
+            started = start_scan(taskid, raw)
+        except requests.RequestException:
+            started = False
+    if not started:
+        log("下发任务失败，跳过")
+        with TIMER.phase("delete_task"):
+            delete_task(taskid)
+        return scan_journal.ERROR
+
+    with TIMER.phase("wait_task"):
+        status = wait_task(taskid)
+    if status == "done":
+        with TIMER.phase("get_data"):
+            records = get_injection_summary(taskid, request_url(raw))
+        if records:
+            log(f"发现注入！记录 {len(records)} 个注入点")
+            for record in records:
+                # 带上请求 key 和轮次，写入后、标记完成前被杀导致同一轮重扫时结果库据此去重
+                record["key"] = key
+                record["round"] = journal.round
+                save_result(record)
+                findings.add(record)
+        else:
+            log("未检测到注入")
+        state = scan_journal.DONE
+    elif status == "timeout":
+        log("任务超时")
+        state = scan_journal.TIMEOUT
+    else:
+        restart_if_hung("任务异常")
+        state = scan_journal.ERROR
+
+    with TIMER.phase("delete_task"):
+        delete_task(taskid)
+    return state
+
 def main():
     if len(sys.argv) < 2:
-        print("用法: python batch_sqlmapapi.py <ltgs-urls_ok.txt>")
+        print("用法: python batch_sqlmapapi.py <ltgs-urls_ok.txt> [--force]")
+        print("      python batch_sqlmapapi.py status")
         sys.exit(1)
 
+    if sys.argv[1] == "status":
+        scan_journal.print_status(JOURNAL_FILE)
+        return
+
     req_file = Path(sys.argv[1])
     if not req_file.exists():
         log(f"{req_file} 不存在")
@@ -152,44 +234,61 @@ def main():
         log("未读取到任何请求")
         return
 
-    log(f"共 {len(requests_list)} 条请求，开始检测...")
+    force = "--force" in sys.argv[2:]
+    journal = ScanJournal(JOURNAL_FILE)
+    requeued = journal.recover()
+    if requeued:
+        log(f"{requeued} 条请求上次被中断，重新排队")
+    keys = [request_key(raw) for raw in requests_list]
+    for key, raw in zip(keys, requests_list):
+        journal.add(key, request_line(raw))
+    if force or journal.round_complete():
+        # 上一轮已跑完（或强制重扫）：开始新一轮，是否跳过交给扫描缓存判断
+        journal.begin_round(keys)
+        log(f"开始第 {journal.round} 轮检测" + ("（忽略缓存）" if force else ""))
+    else:
+        log(f"第 {journal.round} 轮上次被中断，继续检测")
+    pending = sum(1 for key in keys if not journal.is_finished(key))
+
+    log(f"共 {len(requests_list)} 条请求，待检测 {pending} 条，开始检测...")
 
-    api_proc = start_sqlmapapi()
-    if not api_proc:
+    api = make_supervisor()
+    if not api.start():
         log("sqlmapapi 启动失败，脚本终止")
+        journal.close()
         return
 
+    findings = findings_db.FindingsDB(FINDINGS_DB, script="batch_sqlmapapi")
+    cache = ScanCache(CACHE_FILE, CACHE_TTL, CACHE_MAX_ENTRIES)
+    remaining = pending
     try:
-        for idx, raw in enumerate(requests_list, 1):
-            log(f"[{idx}/{len(requests_list)}] 检测第 {idx} 条请求")
-            taskid = new_task()
-            if not taskid:
-                log("创建任务失败，尝试重启 api")
-                api_proc = restart_sqlmapapi(api_proc)
+        for idx, (key, raw) in enumerate(zip(keys, requests_list), 1):
+            if journal.is_finished(key):
                 continue
-
-            if not start_scan(taskid, raw):
-                log("下发任务失败，跳过")
-                delete_task(taskid)
+            remaining -= 1
+            sig, desc = signature_from_raw(raw)
+            if not force and cache.fresh(sig):
+                log(f"[{idx}/{len(requests_list)}] {desc} 近期已检测，跳过")
+                journal.mark(key, scan_journal.SKIPPED)
                 continue
-
-            status = wait_task(taskid)
-            if status == "done":
-                summary = get_injection_summary(taskid)
-                if summary:
-                    log("发现注入！记录结果")
-                    save_result(summary)
-                else:
-                    log("未检测到注入")
-            elif status == "timeout":
-                log("任务超时")
-            else:
-                log("任务异常，尝试重启 api")
-                api_proc = restart_sqlmapapi(api_proc)
-
-            delete_task(taskid)
+            log(f"[{idx}/{len(requests_list)}] 检测第 {idx} 条请求")
+            TIMER.begin(request_line(raw))
+            state = scan_request(api, journal, findings, key, raw)
+            journal.mark(key, state)
+            cache.record(sig, desc, state)
+            TIMER.end(state)
+            eta = TIMER.eta(remaining)
+            if remaining and eta is not None:
+                log(f"剩余 {remaining} 条，预计还需 {format_seconds(eta)}")
+        journal.complete_round()
     finally:
-        kill_proc(api_proc)
+        api.stop()
+        journal.close()
+        findings.close()
+        cache.close()
+        log("耗时统计：\n" + TIMER.summary())
+        TIMER.export(TIMING_CSV)
+        TIMER.export(TIMING_JSON)
         log("全部完成")
 
 if __name__ == "__main__":
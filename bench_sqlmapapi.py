@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_sqlmapapi.py
+用 fake_sqlmapapi.py 离线测量 batch_sqlmapapi.py / batch_sqlmap.py 的调度开销和崩溃恢复时间
+1. 每任务开销：单条请求总耗时减去场景中设定的扫描耗时（含轮询发现延迟、建任务、取数据、删任务）
+2. 崩溃恢复：第 N 个任务开始扫描时替身进程退出，统计 sqlmapapi 不可用时长和工作线程被阻塞的时长
+全部在临时目录中运行，不需要 sqlmap 和真实目标
+用法：
+    python bench_sqlmapapi.py                       # 两个脚本各跑 20 个任务
+    python bench_sqlmapapi.py -n 50 --duration 1 --crash-after 10 --target api
+    python bench_sqlmapapi.py --json bench.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fake_sqlmapapi
+from scan_timing import PhaseTimer, percentile
+
+HERE = Path(__file__).resolve().parent
+FAKE_API = HERE / "fake_sqlmapapi.py"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def write_scenario(workdir, args):
+    scenario = {
+        "duration": args.duration,
+        "vulnerable_every": args.vulnerable_every,
+        "hang_every": args.hang_every,
+        "crash_after": args.crash_after,
+    }
+    path = Path(workdir) / "scenario.json"
+    path.write_text(json.dumps(scenario), encoding="utf-8")
+    return path
+
+
+def run_batch_sqlmapapi(args, port):
+    Path("requests.txt").write_bytes(b"\r\n====\r\n".join(
+        f"GET /item{i}.php?id=1 HTTP/1.1\r\nHost: bench.local\r\n\r\n".encode() for i in range(args.n)))
+    mod = importlib.import_module("batch_sqlmapapi")
+    mod.SQLMAP_DIR = HERE
+    mod.SQLMAPAPI_PY = FAKE_API
+    mod.API_PORT = port
+    mod.API_BASE = f"http://{mod.API_HOST}:{port}"
+    mod.TASK_TIMEOUT = args.timeout
+    mod.TIMER = PhaseTimer()
+    if not args.verbose:
+        mod.log = lambda msg: None
+    sys.argv = ["batch_sqlmapapi.py", "requests.txt"]
+    mod.main()
+    return mod.TIMER
+
+
+def run_batch_sqlmap(args, port):
+    Path("ltgs-urls.txt").write_text(
+        "\n".join(f"http://bench.local/item{i}.php?id=1" for i in range(args.n)), encoding="utf-8")
+    Path("headers.json").write_text("{}", encoding="utf-8")
+    mod = importlib.import_module("batch_sqlmap")
+    mod.SQLMAP_API_PATH = str(FAKE_API)
+    mod.SERVER_PORT = port
+    mod.SCAN_TIMEOUT = args.timeout
+    mod.timer = PhaseTimer()
+    if not args.verbose:
+        mod.logger.setLevel("WARNING")
+    sys.argv = ["batch_sqlmap.py"]
+    mod.main()
+    return mod.timer
+
+
+RUNNERS = {"api": ("batch_sqlmapapi", run_batch_sqlmapapi), "batch": ("batch_sqlmap", run_batch_sqlmap)}
+
+
+def bench(name, runner, args):
+    """在临时目录中跑一次，返回统计结果"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as workdir:
+        os.environ[fake_sqlmapapi.SCENARIO_ENV] = str(write_scenario(workdir, args))
+        os.chdir(workdir)
+        try:
+            start = time.monotonic()
+            timer = runner(args, free_port())
+            wall = time.monotonic() - start
+        finally:
+            os.chdir(cwd)
+    overhead = sorted(max(0.0, r["total"] - args.duration) for r in timer.records if r["outcome"] == "done")
+    stats = timer.stats()
+    restart = stats.get("restart", {})
+    return {
+        "script": name,
+        "tasks": len(timer.records),
+        "wall": wall,
+        "outcomes": timer.outcomes(),
+        "overhead_mean": sum(overhead) / len(overhead) if overhead else 0.0,
+        "overhead_p50": percentile(overhead, 50),
+        "overhead_p90": percentile(overhead, 90),
+        "restarts": restart.get("count", 0),
+        "restart_mean": restart["sum"] / restart["count"] if restart else 0.0,
+        "restart_max": restart.get("max", 0.0),
+        "api_wait": stats.get("api_wait", {}).get("sum", 0.0),
+        "phases": stats,
+    }
+
+
+def print_report(results, args):
+    print(f"任务数 {args.n}，扫描耗时 {args.duration}s，崩溃于第 {args.crash_after or '-'} 个任务，"
+          f"卡死间隔 {args.hang_every or '-'}")
+    for r in results:
+        print(f"\n== {r['script']} ==")
+        print(f"  墙钟 {r['wall']:.2f}s，结果 {r['outcomes']}")
+        print(f"  每任务开销 平均 {r['overhead_mean'] * 1000:.0f}ms  p50 {r['overhead_p50'] * 1000:.0f}ms  "
+              f"p90 {r['overhead_p90'] * 1000:.0f}ms")
+        print(f"  sqlmapapi 重启 {r['restarts']} 次，不可用 平均 {r['restart_mean']:.2f}s  "
+              f"最长 {r['restart_max']:.2f}s，工作线程等待合计 {r['api_wait']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sqlmap 批量脚本离线基准测试")
+    parser.add_argument("-n", type=int, default=20, help="任务数")
+    parser.add_argument("--duration", type=float, default=0.5, help="每个任务的扫描耗时（秒）")
+    parser.add_argument("--vulnerable-every", type=int, default=4, help="每第 N 个任务有注入")
+    parser.add_argument("--hang-every", type=int, default=0, help="每第 N 个任务卡死")
+    parser.add_argument("--crash-after", type=int, default=8, help="第 N 个任务时替身崩溃，0 表示不崩溃")
+    parser.add_argument("--timeout", type=float, default=10, help="单任务超时（秒）")
+    parser.add_argument("--target", choices=("api", "batch", "both"), default="both")
+    parser.add_argument("--json", help="结果另存为 JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="保留脚本自身的日志输出")
+    args = parser.parse_args()
+
+    targets = ("api", "batch") if args.target == "both" else (args.target,)
+    results = [bench(*RUNNERS[t], args) for t in targets]
+    print_report(results, args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_startup.py
+定时脚本冷启动基准：在全新子进程中测量 import base / sendNotify / requests 的耗时和内存
+1. 每个模块先预热（结果丢弃，避免首次读盘拖慢空解释器基线），再跑 N 次 python -X importtime，
+   每次紧接着跑一次空解释器，冷启动耗时取两者差值的中位数，不受机器负载前后波动影响
+2. 按 -X importtime 的 self 耗时列出最慢的依赖模块
+3. 超出预算时退出码为 1，可放进 CI 或 cron 前置检查，防止公共模块启动变慢
+用法：
+    python bench_startup.py
+    python bench_startup.py -n 10 --budget base=30 --budget sendNotify=250 --rss-budget sendNotify=40
+    python bench_startup.py --json startup.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+MODULES = ("base", "sendNotify", "requests")
+RUNS = 5
+WARMUP = 1
+TOP = 8
+
+# 默认预算：import 耗时（毫秒，已扣除解释器启动）/ 进程峰值 RSS（MB）
+BUDGET_MS = {"base": 50, "sendNotify": 400, "requests": 300}
+BUDGET_RSS_MB = {"base": 30, "sendNotify": 60, "requests": 60}
+
+# 子进程: 导入模块后输出峰值 RSS（KB），Windows 下没有 resource 模块则输出 -1
+PROBE = """
+import sys
+{stmt}
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss //= 1024
+except ImportError:
+    rss = -1
+sys.stdout.write("\\n@@rss %d\\n" % rss)
+"""
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def run_probe(module):
+    """跑一次全新解释器，返回 (墙钟秒, RSS KB, {模块: (self us, cumulative us)})"""
+    stmt = f"import {module}" if module else "pass"
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE.format(stmt=stmt)],
+                          cwd=str(HERE), env=env, capture_output=True, text=True,
+                          encoding="utf-8", errors="replace")
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        tail = "\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:"))
+        raise RuntimeError(f"import {module} 失败:\n{tail[-2000:]}")
+    match = re.search(r"@@rss (-?\d+)", proc.stdout)
+    rss = int(match.group(1)) if match else -1
+    imports = {}
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if m:
+            imports[m.group(4)] = (int(m.group(1)), int(m.group(2)))
+    return wall, rss, imports
+
+
+def measure(module, runs, warmup=WARMUP):
+    for _ in range(warmup):
+        run_probe(module)
+    walls, diffs, rsses, cumulative, selfs = [], [], [], [], {}
+    for _ in range(runs):
+        wall, rss, imports = run_probe(module)
+        walls.append(wall)
+        rsses.append(rss)
+        if module:
+            cumulative.append(imports.get(module, (0, 0))[1])
+            diffs.append(wall - run_probe(None)[0])
+        for name, (self_us, _) in imports.items():
+            selfs.setdefault(name, []).append(self_us)
+    return {
+        "wall_ms": statistics.median(walls) * 1000,
+        "startup_ms": max(0.0, statistics.median(diffs) * 1000) if diffs else 0.0,
+        "rss_mb": statistics.median(rsses) / 1024 if min(rsses) >= 0 else None,
+        "importtime_ms": statistics.median(cumulative) / 1000 if cumulative else 0.0,
+        "self_ms": {name: statistics.median(v) / 1000 for name, v in selfs.items()},
+    }
+
+
+def parse_budgets(items, defaults):
+    budgets = dict(defaults)
+    for item in items or []:
+        name, _, value = item.partition("=")
+        budgets[name] = float(value)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="base / sendNotify 冷启动基准")
+    parser.add_argument("-n", "--runs", type=int, default=RUNS, help="每个模块的运行次数")
+    parser.add_argument("-w", "--warmup", type=int, default=WARMUP, help="每个模块预热次数（不计入结果）")
+    parser.add_argument("-m", "--module", action="append", help=f"要测的模块，默认 {', '.join(MODULES)}")
+    parser.add_argument("--budget", action="append", metavar="模块=毫秒", help="import 耗时预算")
+    parser.add_argument("--rss-budget", action="append", metavar="模块=MB", help="峰值 RSS 预算")
+    parser.add_argument("--json", help="结果另存为 JSON")
+    args = parser.parse_args()
+
+    modules = args.module or MODULES
+    budget_ms = parse_budgets(args.budget, BUDGET_MS)
+    budget_rss = parse_budgets(args.rss_budget, BUDGET_RSS_MB)
+
+    baseline = measure(None, args.runs, args.warmup)
+    print(f"空解释器启动 {baseline['wall_ms']:.1f}ms"
+          + (f"，RSS {baseline['rss_mb']:.1f}MB" if baseline["rss_mb"] is not None else ""))
+
+    results, failures = {"baseline": baseline}, []
+    for module in modules:
+        try:
+            r = measure(module, args.runs, args.warmup)
+        except RuntimeError as e:
+            print(e)
+            failures.append(f"{module}: 无法导入")
+            continue
+        # 只列出该模块额外带进来的依赖，解释器启动本身就会导入的模块不计
+        r["top_self_ms"] = sorted(((name, ms) for name, ms in r.pop("self_ms").items()
+                                   if name not in baseline["self_ms"]), key=lambda kv: -kv[1])[:TOP]
+        results[module] = r
+        rss = f"{r['rss_mb']:.1f}MB" if r["rss_mb"] is not None else "-"
+        print(f"\n== {module} ==")
+        print(f"  冷启动 +{r['startup_ms']:.1f}ms（墙钟 {r['wall_ms']:.1f}ms），"
+              f"importtime {r['importtime_ms']:.1f}ms，峰值 RSS {rss}")
+        for name, ms in r["top_self_ms"]:
+            print(f"    {ms:8.2f}ms  {name}")
+        if module in budget_ms and r["importtime_ms"] > budget_ms[module]:
+            failures.append(f"{module}: import {r['importtime_ms']:.1f}ms > 预算 {budget_ms[module]:g}ms")
+        if module in budget_rss and r["rss_mb"] is not None and r["rss_mb"] > budget_rss[module]:
+            failures.append(f"{module}: RSS {r['rss_mb']:.1f}MB > 预算 {budget_rss[module]:g}MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if failures:
+        print("\n超出预算:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\n全部在预算内")
+
+
+if __name__ == "__main__":
+    main()
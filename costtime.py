@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+costtime.py
+脚本耗时统计
+1. @time_counts 统计被装饰函数的调用次数、总耗时、p50/p90/p99，支持多线程和 multiprocessing 子进程
+2. 主进程退出时汇总（含子进程）打印，设置 COSTTIME_JSON=路径 时另存为 JSON
+3. COSTTIME_PROFILE=cprofile|tracemalloc|all 时对整个运行做 cProfile / 内存分配统计，无需改代码：
+       COSTTIME_PROFILE=cprofile python 海信爱家_jm.py          # 脚本已 import costtime
+       python -m costtime 街电充电宝_jm.py                       # 任意脚本，默认 cprofile
+   cProfile 结果另存为 COSTTIME_PROFILE_OUT（默认 costtime.prof），可用 snakeviz 等查看
+用法：
+    from costtime import time_counts
+    @time_counts
+    def runtasklist(self): ...
+"""
+
+import atexit
+import functools
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ENV_SPOOL = "COSTTIME_SPOOL"            # 子进程结果目录，由主进程设置
+ENV_JSON = "COSTTIME_JSON"
+ENV_PROFILE = "COSTTIME_PROFILE"
+ENV_PROFILE_OUT = "COSTTIME_PROFILE_OUT"
+PERCENTILES = (50, 90, 99)
+SAMPLE_SIZE = 10000                     # 每个函数最多保留的耗时样本（蓄水池抽样），用于算分位数
+PROFILE_TOP = 30
+
+_ROOT_PID = os.getpid()
+_lock = threading.Lock()
+_stats = {}                             # 函数名 -> {"count", "total", "max", "samples"}
+_flush_pid = None                       # 已注册退出时写结果的子进程 pid
+_profiler = None
+
+
+def _is_root():
+    # fork 出的子进程会继承 _ROOT_PID，用 pid 区分
+    return os.getpid() == _ROOT_PID and os.environ.get(ENV_SPOOL, "").endswith(f"_{_ROOT_PID}")
+
+
+def _spool_dir():
+    path = os.environ.get(ENV_SPOOL)
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), f"costtime_{_ROOT_PID}")
+        os.environ[ENV_SPOOL] = path    # spawn 的子进程通过环境变量找到同一目录
+    return path
+
+
+def _flush_child():
+    """把本子进程的统计写入结果目录，进程退出时执行一次"""
+    spool = _spool_dir()
+    os.makedirs(spool, exist_ok=True)
+    path = os.path.join(spool, f"{os.getpid()}.json")
+    with _lock:
+        data = {name: dict(stat, samples=list(stat["samples"])) for name, stat in _stats.items()}
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+def _register_child_flush():
+    """multiprocessing 子进程退出时不执行 atexit，改用 util.Finalize（由 _exit_function 调用）"""
+    global _flush_pid
+    _flush_pid = os.getpid()
+    mp_util = sys.modules.get("multiprocessing.util")
+    if mp_util is not None:
+        mp_util.Finalize(None, _flush_child, exitpriority=100)
+    atexit.register(_flush_child)
+
+
+def _reset_after_fork():
+    # fork 出的子进程会复制父进程已有的统计，清空后只统计自己的调用
+    global _lock
+    _lock = threading.Lock()
+    _stats.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _record(name, elapsed):
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = {"count": 0, "total": 0.0, "max": 0.0, "samples": []}
+        stat["count"] += 1
+        stat["total"] += elapsed
+        stat["max"] = max(stat["max"], elapsed)
+        samples = stat["samples"]
+        if len(samples) < SAMPLE_SIZE:
+            samples.append(elapsed)
+        else:
+            i = random.randrange(stat["count"])
+            if i < SAMPLE_SIZE:
+                samples[i] = elapsed
+
+
+def time_counts(func):
+    # spawn/forkserver 的子进程以 __mp_main__ 重新导入主脚本，与主进程的 __main__ 合并成一行
+    module = "__main__" if func.__module__ == "__mp_main__" else func.__module__
+    name = f"{module}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _record(name, time.perf_counter() - start)
+            if _flush_pid != os.getpid() and not _is_root():
+                _register_child_flush()
+    return wrapper
+
+
+def percentile(samples, pct):
+    """带权重的最近秩法百分位，samples 为按耗时排序的 [(耗时, 权重)]"""
+    if not samples:
+        return 0.0
+    target = pct / 100 * sum(weight for _, weight in samples)
+    seen = 0.0
+    for value, weight in samples:
+        seen += weight
+        if seen >= target:
+            return value
+    return samples[-1][0]
+
+
+def collect():
+    """合并主进程和子进程的耗时，返回 {函数名: 统计}"""
+    merged = {}
+
+    def merge(name, stat):
+        m = merged.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "samples": []})
+        m["count"] += stat["count"]
+        m["total"] += stat["total"]
+        m["max"] = max(m["max"], stat["max"])
+        # 各进程的样本数有上限，按 调用次数 / 样本数 加权，调用多的进程在分位数中占比相应更大
+        if stat["samples"]:
+            weight = stat["count"] / len(stat["samples"])
+            m["samples"].extend((value, weight) for value in stat["samples"])
+
+    with _lock:
+        for name, stat in _stats.items():
+            merge(name, stat)
+    spool = os.environ.get(ENV_SPOOL)
+    if spool and os.path.isdir(spool):
+        for entry in os.listdir(spool):
+            if not entry.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(spool, entry), "r", encoding="utf-8") as f:
+                    for name, stat in json.load(f).items():
+                        merge(name, stat)
+            except (OSError, ValueError, KeyError):
+                continue
+    stats = {}
+    for name, m in merged.items():
+        samples = sorted(m["samples"])
+        stat = {"count": m["count"], "total": m["total"], "max": m["max"]}
+        for pct in PERCENTILES:
+            stat[f"p{pct}"] = percentile(samples, pct)
+        stats[name] = stat
+    return stats
+
+
+def summary(stats):
+    lines = ["耗时统计:", f"{'函数':<40}{'次数':>6}{'总耗时(s)':>11}" +
+             "".join(f"{'p' + str(p) + '(s)':>9}" for p in PERCENTILES) + f"{'max(s)':>9}"]
+    for name, stat in sorted(stats.items(), key=lambda kv: -kv[1]["total"]):
+        lines.append(f"{name:<40}{stat['count']:>6}{stat['total']:>11.3f}" +
+                     "".join(f"{stat['p' + str(p)]:>9.3f}" for p in PERCENTILES) + f"{stat['max']:>9.3f}")
+    return "\n".join(lines)
+
+
+# ---------- cProfile / tracemalloc ----------
+def _profile_modes():
+    mode = os.environ.get(ENV_PROFILE, "").lower()
+    if mode == "all":
+        return {"cprofile", "tracemalloc"}
+    return {m.strip() for m in mode.split(",") if m.strip()}
+
+
+def start_profiling(modes):
+    global _profiler
+    if "tracemalloc" in modes:
+        import tracemalloc
+        tracemalloc.start()
+    if "cprofile" in modes:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def stop_profiling():
+    global _profiler
+    if _profiler is not None:
+        import pstats
+        _profiler.disable()
+        out = os.environ.get(ENV_PROFILE_OUT, "costtime.prof")
+        _profiler.dump_stats(out)
+        print(f"cProfile 结果已保存至 {out}，耗时最多的 {PROFILE_TOP} 项:")
+        pstats.Stats(_profiler).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        _profiler = None
+    if "tracemalloc" in sys.modules and sys.modules["tracemalloc"].is_tracing():
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"内存: 当前 {current / 1024:.1f} KiB, 峰值 {peak / 1024:.1f} KiB，分配最多的 20 行:")
+        for stat in snapshot.statistics("lineno")[:20]:
+            print(f"  {stat}")
+
+
+# ---------- 主进程退出时汇总 ----------
+def _report():
+    if not _is_root():
+        return
+    mp = sys.modules.get("multiprocessing")
+    if mp is not None:
+        # 脚本常在 start() 后直接 sys.exit()，先等子进程结束再汇总
+        for child in mp.active_children():
+            child.join()
+    stop_profiling()
+    stats = collect()
+    spool = os.environ.get(ENV_SPOOL)
+    if spool and os.path.isdir(spool):
+        for entry in os.listdir(spool):
+            os.remove(os.path.join(spool, entry))
+        os.rmdir(spool)
+    if not stats:
+        return
+    print(summary(stats))
+    out = os.environ.get(ENV_JSON)
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(stats, f, ensure_ascii=False, indent=2)
+
+
+if ENV_SPOOL not in os.environ:
+    # 主进程：子进程（fork/spawn）继承环境变量后不会再注册
+    _spool_dir()
+    atexit.register(_report)
+    if _profile_modes() and __name__ != "__main__":
+        start_profiling(_profile_modes())
+
+
+def main():
+    """python -m costtime script.py [args...]：在 cProfile/tracemalloc 下运行任意脚本"""
+    import runpy
+    if len(sys.argv) < 2:
+        print("用法: python -m costtime <script.py> [参数...]")
+        sys.exit(1)
+    modes = _profile_modes() or {"cprofile"}
+    script = sys.argv[1]
+    sys.argv = sys.argv[1:]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    # 脚本里的 from costtime import time_counts 要用到本模块，而不是再导入一份
+    sys.modules["costtime"] = sys.modules[__name__]
+    start_profiling(modes)
+    runpy.run_path(script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fake_sqlmapapi.py
+本地 sqlmapapi 替身，用于离线测试 batch_sqlmapapi.py / batch_sqlmap.py，无需 sqlmap 和真实目标
+实现脚本用到的接口：
+    /task/new  /scan/{id}/start  /scan/{id}/status  /scan/{id}/data  /task/{id}/delete  /admin/0/list
+扫描耗时、崩溃、卡死、返回数据通过场景文件（JSON）配置，路径由 -f 或环境变量 FAKE_SQLMAPAPI_SCENARIO 指定：
+    {
+        "duration": 2,              # 默认扫描耗时（秒）
+        "jitter": 0.5,              # 耗时随机浮动（秒）
+        "vulnerable_every": 3,      # 每第 N 个任务返回注入数据，0 表示从不
+        "hang_every": 0,            # 每第 N 个任务永远 running，0 表示从不
+        "crash_after": 0,           # 第 N 个任务开始扫描时进程直接退出，0 表示从不
+        "data": [...],              # 有注入时 /scan/{id}/data 返回的 data，缺省为内置样例
+        "tasks": {"5": {"duration": 10, "hang": false, "crash": false, "vulnerable": true, "data": [...]}}
+    }
+任务按启动扫描的先后从 1 开始编号，tasks 中的配置覆盖全局配置。
+编号保存在场景文件旁的 <场景文件>.seq 中，崩溃后被脚本重新拉起时接着编号，crash_after 只触发一次；
+复用同一场景文件重新测试前删除该文件即可从 1 开始。
+用法（参数与 sqlmapapi.py 一致，可被脚本直接拉起）：
+    python fake_sqlmapapi.py -s -H 127.0.0.1 -p 8775
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCENARIO_ENV = "FAKE_SQLMAPAPI_SCENARIO"
+
+# 与 sqlmap 的 CONTENT_TYPE 一致: 0 目标, 1 注入点, 12 数据库, 13 表
+SAMPLE_DATA = [
+    {"status": 1, "type": 0, "value": {"url": "http://testphp.vulnweb.com/artists.php", "query": "artist=1", "data": None}},
+    {"status": 1, "type": 1, "value": [{
+        "place": "GET", "parameter": "artist", "ptype": 1, "prefix": "", "suffix": "",
+        "dbms": "MySQL", "dbms_version": [">= 5.6"],
+        "data": {"1": {"title": "AND boolean-based blind - WHERE or HAVING clause",
+                       "payload": "artist=1 AND 4196=4196", "where": 1, "vector": "AND [INFERENCE]"}},
+    }]},
+    {"status": 1, "type": 12, "value": ["acuart", "information_schema"]},
+    {"status": 1, "type": 13, "value": {"acuart": ["artists", "carts", "users"]}},
+]
+
+DEFAULT_SCENARIO = {
+    "duration": 2,
+    "jitter": 0,
+    "vulnerable_every": 0,
+    "hang_every": 0,
+    "crash_after": 0,
+    "data": SAMPLE_DATA,
+    "tasks": {},
+}
+
+
+def load_scenario(path=None):
+    scenario = dict(DEFAULT_SCENARIO)
+    path = path or os.environ.get(SCENARIO_ENV)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            scenario.update(json.load(f))
+    return scenario
+
+
+def seq_path(scenario_path=None):
+    """任务编号文件，没有场景文件时只在内存中计数"""
+    scenario_path = scenario_path or os.environ.get(SCENARIO_ENV)
+    return scenario_path + ".seq" if scenario_path else None
+
+
+def every(n, seq):
+    return bool(n) and seq % n == 0
+
+
+class FakeApi:
+    def __init__(self, scenario, seq_file=None):
+        self.scenario = scenario
+        self.tasks = {}
+        self.seq_file = seq_file
+        self.started = 0
+        if seq_file and os.path.exists(seq_file):
+            with open(seq_file, "r", encoding="utf-8") as f:
+                self.started = int(f.read().strip() or 0)
+        self.lock = threading.Lock()
+
+    def new_task(self):
+        taskid = uuid.uuid4().hex[:16]
+        with self.lock:
+            self.tasks[taskid] = {"seq": None, "start": None, "plan": None}
+        return taskid
+
+    def start_scan(self, taskid):
+        with self.lock:
+            task = self.tasks.get(taskid)
+            if task is None:
+                return False
+            self.started += 1
+            seq = self.started
+            if self.seq_file:
+                # 先记下编号再决定是否崩溃，重新拉起后不会再次在同一编号崩溃
+                with open(self.seq_file, "w", encoding="utf-8") as f:
+                    f.write(str(seq))
+        s = self.scenario
+        override = s["tasks"].get(str(seq), {})
+        plan = {
+            "duration": max(0.0, override.get("duration", s["duration"]) + random.uniform(-s["jitter"], s["jitter"])),
+            "hang": override.get("hang", every(s["hang_every"], seq)),
+            "vulnerable": override.get("vulnerable", every(s["vulnerable_every"], seq)),
+            "data": override.get("data", s["data"]),
+        }
+        if override.get("crash", s["crash_after"] == seq):
+            # 模拟 sqlmapapi 进程崩溃
+            os._exit(1)
+        task.update(seq=seq, start=time.monotonic(), plan=plan)
+        return True
+
+    def status(self, taskid):
+        task = self.tasks.get(taskid)
+        if task is None:
+            return None
+        if task["start"] is None:
+            return "not running"
+        plan = task["plan"]
+        if plan["hang"] or time.monotonic() - task["start"] < plan["duration"]:
+            return "running"
+        return "terminated"
+
+    def data(self, taskid):
+        task = self.tasks.get(taskid)
+        if task is None:
+            return None
+        if self.status(taskid) != "terminated" or not task["plan"]["vulnerable"]:
+            return []
+        return task["plan"]["data"]
+
+    def delete(self, taskid):
+        with self.lock:
+            return self.tasks.pop(taskid, None) is not None
+
+
+ROUTES = [
+    ("GET", re.compile(r"^/task/new$"), "task_new"),
+    ("POST", re.compile(r"^/scan/(\w+)/start$"), "scan_start"),
+    ("GET", re.compile(r"^/scan/(\w+)/status$"), "scan_status"),
+    ("GET", re.compile(r"^/scan/(\w+)/data$"), "scan_data"),
+    ("GET", re.compile(r"^/task/(\w+)/delete$"), "task_delete"),
+    ("GET", re.compile(r"^/admin/\w+/list$"), "admin_list"),
+    ("GET", re.compile(r"^/$"), "index"),
+]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # 支持 keep-alive
+    disable_nagle_algorithm = True  # 响应头和响应体分两次写，不关 Nagle 时 keep-alive 下每个请求多等约 40ms 延迟确认
+    api = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, obj, code=200):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def dispatch(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        path = self.path.split("?", 1)[0]
+        for route_method, pattern, name in ROUTES:
+            m = pattern.match(path)
+            if m and route_method == method:
+                return getattr(self, name)(*m.groups())
+        self.send_json({"success": False, "message": "Not found"}, 404)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    # ---------- 接口 ----------
+    def index(self):
+        self.send_json({"success": True})
+
+    def task_new(self):
+        self.send_json({"success": True, "taskid": self.api.new_task()})
+
+    def scan_start(self, taskid):
+        if not self.api.start_scan(taskid):
+            return self.send_json({"success": False, "message": "Invalid task ID"})
+        self.send_json({"success": True, "engineid": os.getpid()})
+
+    def scan_status(self, taskid):
+        status = self.api.status(taskid)
+        if status is None:
+            return self.send_json({"success": False, "message": "Invalid task ID"})
+        returncode = 0 if status == "terminated" else None
+        self.send_json({"success": True, "status": status, "returncode": returncode})
+
+    def scan_data(self, taskid):
+        data = self.api.data(taskid)
+        if data is None:
+            return self.send_json({"success": False, "message": "Invalid task ID"})
+        self.send_json({"success": True, "data": data, "error": []})
+
+    def task_delete(self, taskid):
+        if not self.api.delete(taskid):
+            return self.send_json({"success": False, "message": "Non-existing task ID"})
+        self.send_json({"success": True})
+
+    def admin_list(self):
+        tasks = {taskid: self.api.status(taskid) for taskid in list(self.api.tasks)}
+        self.send_json({"success": True, "tasks": tasks, "tasks_num": len(tasks)})
+
+
+def serve(host, port, scenario, seq_file=None):
+    Handler.api = FakeApi(scenario, seq_file)
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sqlmapapi 替身")
+    parser.add_argument("-s", "--server", action="store_true", help="兼容 sqlmapapi 参数，忽略")
+    parser.add_argument("-H", "--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8775)
+    parser.add_argument("-f", "--scenario", help=f"场景文件，缺省读取环境变量 {SCENARIO_ENV}")
+    args = parser.parse_args()
+    try:
+        serve(args.host, args.port, load_scenario(args.scenario), seq_path(args.scenario))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
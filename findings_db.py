@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+findings_db.py
+batch_sqlmapapi.py / batch_sqlmap.py 共用的注入结果库（SQLite，带索引）
+1. normalize_findings: 把 sqlmapapi /scan/{id}/data 的返回统一解析成
+   target / parameter / place / payload / dbms / dbs / tables
+   type 按 sqlmap 的 CONTENT_TYPE：0 目标，1 注入点，12 数据库，13 表
+2. FindingsDB: 每次扫描发现的注入点都写入同一个库，跨多次运行累积；
+   记录带 key / round（断点续扫日志的请求 key 和轮次）时，同一轮里同一请求的同一注入点只记录一次，
+   防止写入后、标记完成前被杀导致重扫时重复；之后各轮再次发现会另记一条
+3. 命令行查询，不再需要 grep 各次运行的文本结果
+用法：
+    python findings_db.py list --target example.com --since 2026-01-01
+    python findings_db.py list --table users --json
+    python findings_db.py summary
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_DB = "sqlmap_findings.db"
+
+# sqlmap lib/core/enums.py CONTENT_TYPE
+TYPE_TARGET = 0
+TYPE_TECHNIQUES = 1
+TYPE_DBS = 12
+TYPE_TABLES = 13
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    id        INTEGER PRIMARY KEY,
+    found_at  REAL NOT NULL,
+    run       TEXT NOT NULL,
+    script    TEXT NOT NULL,
+    target    TEXT NOT NULL,
+    host      TEXT NOT NULL,
+    parameter TEXT NOT NULL,
+    place     TEXT NOT NULL,
+    payload   TEXT NOT NULL,
+    dbms      TEXT NOT NULL,
+    key       TEXT NOT NULL DEFAULT '',
+    round     INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_findings_host ON findings(host);
+CREATE INDEX IF NOT EXISTS idx_findings_found_at ON findings(found_at);
+CREATE INDEX IF NOT EXISTS idx_findings_parameter ON findings(parameter);
+CREATE TABLE IF NOT EXISTS finding_tables (
+    finding_id INTEGER NOT NULL REFERENCES findings(id),
+    db         TEXT NOT NULL,
+    name       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_finding_tables_id ON finding_tables(finding_id);
+CREATE INDEX IF NOT EXISTS idx_finding_tables_name ON finding_tables(name);
+"""
+
+
+def host_of(target):
+    """从 URL 或报文首行中取主机名"""
+    rest = target.split("://", 1)[1] if "://" in target else target
+    return rest.split("/", 1)[0].split("?", 1)[0].lower()
+
+
+def normalize_findings(data, target=""):
+    """解析 /scan/{id}/data 的返回，每个注入点一条记录；无注入返回 []"""
+    items = (data or {}).get("data") or []
+    points, dbs, tables = [], [], {}
+    for item in items:
+        value = item.get("value")
+        if item.get("type") == TYPE_TARGET and isinstance(value, dict):
+            url = value.get("url") or ""
+            if url:
+                target = url + ("?" + value["query"] if value.get("query") else "")
+        elif item.get("type") == TYPE_TECHNIQUES and isinstance(value, list):
+            points.extend(v for v in value if isinstance(v, dict))
+        elif item.get("type") == TYPE_DBS and isinstance(value, list):
+            dbs = value
+        elif item.get("type") == TYPE_TABLES and isinstance(value, dict):
+            tables = value
+    records = []
+    for point in points:
+        techniques = point.get("data") or {}
+        payloads = [t.get("payload", "") for t in techniques.values() if isinstance(t, dict)]
+        records.append({
+            "target": target,
+            "parameter": point.get("parameter", ""),
+            "place": point.get("place", ""),
+            "payload": payloads[0] if payloads else "",
+            "dbms": point.get("dbms") or "",
+            "dbs": list(dbs),
+            "tables": dict(tables),
+        })
+    return records
+
+
+class FindingsDB:
+    def __init__(self, path=DEFAULT_DB, script=""):
+        self.path = Path(path)
+        self.script = script
+        self.run = time.strftime("%Y%m%d-%H%M%S")
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(_SCHEMA)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(findings)")]
+        # 旧版结果库没有 key / round 列
+        if "key" not in columns:
+            self.conn.execute("ALTER TABLE findings ADD COLUMN key TEXT NOT NULL DEFAULT ''")
+        if "round" not in columns:
+            self.conn.execute("ALTER TABLE findings ADD COLUMN round INTEGER NOT NULL DEFAULT 0")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_findings_key ON findings(key)")
+        self.conn.commit()
+
+    def exists(self, record):
+        """本脚本同一轮中同一请求 key 的同一注入点（参数 + 位置）是否已记录"""
+        if not record.get("key"):
+            return False
+        return self.conn.execute(
+            "SELECT 1 FROM findings WHERE script = ? AND key = ? AND round = ? AND parameter = ? AND place = ?"
+            " LIMIT 1",
+            (self.script, record["key"], record.get("round", 0), record["parameter"],
+             record["place"])).fetchone() is not None
+
+    def add(self, record):
+        """写入一条记录，已记录过（见 exists）则跳过，返回是否写入"""
+        if self.exists(record):
+            return False
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO findings(found_at, run, script, target, host, parameter, place, payload, dbms,"
+                " key, round) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), self.run, self.script, record["target"], host_of(record["target"]),
+                 record["parameter"], record["place"], record["payload"], record.get("dbms", ""),
+                 record.get("key", ""), record.get("round", 0)))
+            rows = [(cur.lastrowid, db, name)
+                    for db, names in record["tables"].items() for name in names]
+            # 只拿到库名、没拿到表的库也记录下来
+            rows += [(cur.lastrowid, db, None) for db in record["dbs"] if db not in record["tables"]]
+            self.conn.executemany("INSERT INTO finding_tables(finding_id, db, name) VALUES (?, ?, ?)", rows)
+        return True
+
+    def query(self, target=None, host=None, parameter=None, table=None, since=None, limit=None):
+        """按条件查询，返回与 normalize_findings 相同结构的记录（附 found_at/run/script）"""
+        sql = "SELECT id, found_at, run, script, target, parameter, place, payload, dbms FROM findings"
+        where, args = [], []
+        if target:
+            where.append("target LIKE ?")
+            args.append(f"%{target}%")
+        if host:
+            where.append("host = ?")
+            args.append(host.lower())
+        if parameter:
+            where.append("parameter = ?")
+            args.append(parameter)
+        if table:
+            where.append("id IN (SELECT finding_id FROM finding_tables WHERE name = ?)")
+            args.append(table)
+        if since:
+            where.append("found_at >= ?")
+            args.append(since)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY found_at DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        records = []
+        for row in self.conn.execute(sql, args).fetchall():
+            fid, found_at, run, script, target_, parameter_, place, payload, dbms = row
+            dbs, tables = [], {}
+            for db, name in self.conn.execute(
+                    "SELECT db, name FROM finding_tables WHERE finding_id = ? ORDER BY rowid", (fid,)):
+                if db not in dbs:
+                    dbs.append(db)
+                if name is not None:
+                    tables.setdefault(db, []).append(name)
+            records.append({"found_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(found_at)),
+                            "run": run, "script": script, "target": target_, "parameter": parameter_,
+                            "place": place, "payload": payload, "dbms": dbms, "dbs": dbs, "tables": tables})
+        return records
+
+    def summary(self):
+        """按主机汇总: (host, 注入点数, 参数数, 最近发现时间)"""
+        return self.conn.execute(
+            "SELECT host, COUNT(*), COUNT(DISTINCT parameter), MAX(found_at) FROM findings"
+            " GROUP BY host ORDER BY MAX(found_at) DESC").fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询 sqlmap 注入结果库")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"结果库路径，默认 {DEFAULT_DB}")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    ls = sub.add_parser("list", help="列出注入点")
+    ls.add_argument("--target", help="目标 URL 包含的字符串")
+    ls.add_argument("--host", help="主机名")
+    ls.add_argument("--param", help="参数名")
+    ls.add_argument("--table", help="暴露了该表名")
+    ls.add_argument("--since", help="起始日期 YYYY-MM-DD")
+    ls.add_argument("--limit", type=int)
+    ls.add_argument("--json", action="store_true", help="以 JSONL 输出")
+    sub.add_parser("summary", help="按主机汇总")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"{args.db} 不存在")
+        sys.exit(1)
+    db = FindingsDB(args.db)
+    try:
+        if args.cmd == "summary":
+            for host, n, params, last in db.summary():
+                last = time.strftime("%Y-%m-%d %H:%M", time.localtime(last))
+                print(f"{host:<40} 注入点 {n:<5} 参数 {params:<5} 最近 {last}")
+            return
+        since = time.mktime(time.strptime(args.since, "%Y-%m-%d")) if args.since else None
+        records = db.query(args.target, args.host, args.param, args.table, since, args.limit)
+        for r in records:
+            if args.json:
+                print(json.dumps(r, ensure_ascii=False))
+                continue
+            print(f"[{r['found_at']}] {r['target']}")
+            print(f"  参数: {r['parameter']} ({r['place']})  DBMS: {r['dbms']}")
+            print(f"  Payload: {r['payload']}")
+            if r["dbs"]:
+                print(f"  数据库: {', '.join(r['dbs'])}")
+            for name, tables in r["tables"].items():
+                print(f"  {name}: {', '.join(tables)}")
+        if not args.json:
+            print(f"共 {len(records)} 条")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
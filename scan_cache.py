@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+scan_cache.py
+batch_sqlmapapi.py / batch_sqlmap.py 共用的跨运行扫描缓存（SQLite）
+1. 以规范化的请求签名为键：方法、主机、路径、参数名（不含参数值）、Content-Type
+2. 记录每个签名最近一次扫描的时间和结果
+3. TTL 内已成功扫描过的签名直接跳过（--force 强制重扫），同一次运行中参数值不同的重复接口也只扫一次
+4. 超过 max_entries 时按最近扫描时间淘汰最旧的记录
+用法：
+    cache = ScanCache("scan_cache.db", ttl=30 * 86400)
+    sig, desc = signature_from_raw(raw)
+    if not cache.fresh(sig): ...
+    cache.record(sig, desc, "done")
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+DEFAULT_TTL = 30 * 86400        # 秒
+DEFAULT_MAX_ENTRIES = 100000
+FRESH_OUTCOMES = ("done",)      # 只有正常扫完的才跳过，超时/异常下次照常扫描
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    sig        TEXT PRIMARY KEY,
+    descr      TEXT NOT NULL,
+    outcome    TEXT NOT NULL,
+    scanned_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_scanned_at ON cache(scanned_at);
+"""
+
+
+def param_names(text, content_type=""):
+    """参数名（去重排序），支持 query/urlencoded 和 JSON 顶层键"""
+    text = text.strip()
+    if "json" in content_type or text[:1] in ("{", "["):
+        try:
+            obj = json.loads(text)
+            return sorted(obj) if isinstance(obj, dict) else []
+        except ValueError:
+            pass
+    return sorted({k for k, _ in parse_qsl(text, keep_blank_values=True)})
+
+
+def make_signature(method, host, path, params, content_type=""):
+    """返回 (sha256 签名, 可读描述)"""
+    content_type = content_type.split(";", 1)[0].strip().lower()
+    desc = f"{method.upper()} {host.lower()}{path} [{','.join(params)}] {content_type}".rstrip()
+    return hashlib.sha256(desc.encode("utf-8")).hexdigest(), desc
+
+
+def signature_from_url(url, method="GET", content_type="", body=""):
+    parts = urlsplit(url)
+    params = sorted(set(param_names(parts.query)) | set(param_names(body, content_type)))
+    return make_signature(method, parts.netloc, parts.path or "/", params, content_type)
+
+
+def signature_from_raw(raw_http):
+    """由完整 HTTP 报文计算签名"""
+    text = raw_http.decode("utf-8", errors="ignore")
+    sep = "\r\n\r\n" if "\r\n\r\n" in text else "\n\n"
+    head, _, body = text.partition(sep)
+    lines = head.splitlines()
+    first = lines[0].split() if lines else []
+    method = first[0] if first else "GET"
+    target = first[1] if len(first) > 1 else "/"
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "://" not in target:
+        target = f"http://{headers.get('host', '')}{target}"
+    return signature_from_url(target, method, headers.get("content-type", ""), body)
+
+
+class ScanCache:
+    def __init__(self, path, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def lookup(self, sig):
+        """(outcome, scanned_at) 或 None"""
+        return self.conn.execute("SELECT outcome, scanned_at FROM cache WHERE sig = ?", (sig,)).fetchone()
+
+    def fresh(self, sig):
+        """TTL 内已成功扫描过"""
+        row = self.lookup(sig)
+        return bool(row) and row[0] in FRESH_OUTCOMES and time.time() - row[1] < self.ttl
+
+    def record(self, sig, desc, outcome):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO cache(sig, descr, outcome, scanned_at) VALUES (?, ?, ?, ?)",
+            (sig, desc, outcome, time.time()))
+        self.conn.commit()
+
+    def evict(self):
+        """超出容量时删除最早扫描的记录，返回删除条数"""
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count <= self.max_entries:
+            return 0
+        self.conn.execute(
+            "DELETE FROM cache WHERE sig IN (SELECT sig FROM cache ORDER BY scanned_at LIMIT ?)",
+            (count - self.max_entries,))
+        self.conn.commit()
+        return count - self.max_entries
+
+    def close(self):
+        self.evict()
+        self.conn.close()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+scan_journal.py
+batch_sqlmapapi.py / batch_sqlmap.py 共用的断点续扫日志（SQLite）
+1. 以原始请求报文或 URL 的 sha256 作为主键
+2. 记录每条请求的状态（pending/running/done/timeout/error/skipped）及 sqlmapapi 任务 id
+3. 重启后跳过已完成的请求，把中断时仍在 running 的请求重新放回 pending
+4. 只负责同一轮扫描的断点续扫：上一轮跑完（不论是否有新增或出错的请求）或指定 --force 时
+   用 begin_round() 开始新一轮，是否真正重扫由 scan_cache.py 决定；上一轮被中断时才接着扫
+用法：
+    journal = ScanJournal("scan_journal.db")
+    journal.recover()
+    key = request_key(raw)
+    journal.add(key, target)
+    if journal.round_complete():
+        journal.begin_round(keys)
+    if not journal.is_finished(key): ...
+    journal.complete_round()
+"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+TIMEOUT = "timeout"
+ERROR = "error"
+SKIPPED = "skipped"     # 扫描缓存命中（见 scan_cache.py），未实际扫描
+
+STATES = (PENDING, RUNNING, DONE, TIMEOUT, ERROR, SKIPPED)
+# error 多半是 sqlmapapi 挂掉导致，重启后重新检测；done/timeout/skipped 视为已完成
+FINISHED = (DONE, TIMEOUT, SKIPPED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    key     TEXT PRIMARY KEY,
+    target  TEXT NOT NULL DEFAULT '',
+    state   TEXT NOT NULL,
+    taskid  TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scans_state ON scans(state);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def request_key(data):
+    """原始请求（bytes）或 URL（str）的 sha256"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class ScanJournal:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(_SCHEMA)
+        if self._meta("round") is None:
+            # 新建或旧版日志：还有 pending/running 的请求说明上一轮被中断
+            unfinished = self.conn.execute(
+                "SELECT COUNT(*) FROM scans WHERE state IN (?, ?)", (PENDING, RUNNING)).fetchone()[0]
+            self._set_meta("round", 0)
+            self._set_meta("complete", 0 if unfinished else 1)
+        self.conn.commit()
+        self.round = int(self._meta("round"))
+
+    def _meta(self, name):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta(name, value) VALUES (?, ?)", (name, str(value)))
+
+    def add(self, key, target=""):
+        """登记一条请求，已存在则保持原状态"""
+        self.conn.execute(
+            "INSERT OR IGNORE INTO scans(key, target, state, updated) VALUES (?, ?, ?, ?)",
+            (key, target, PENDING, time.time()))
+        self.conn.commit()
+
+    def mark(self, key, state, taskid=None):
+        """更新状态；taskid 为 None 时保留原任务 id"""
+        if state not in STATES:
+            raise ValueError(f"未知状态: {state}")
+        self.conn.execute(
+            "UPDATE scans SET state = ?, taskid = COALESCE(?, taskid), updated = ? WHERE key = ?",
+            (state, taskid, time.time(), key))
+        self.conn.commit()
+
+    def state(self, key):
+        row = self.conn.execute("SELECT state FROM scans WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def is_finished(self, key):
+        return self.state(key) in FINISHED
+
+    def recover(self):
+        """上次被中断时仍在 running 的请求重新排队，返回数量"""
+        cur = self.conn.execute(
+            "UPDATE scans SET state = ?, updated = ? WHERE state = ?",
+            (PENDING, time.time(), RUNNING))
+        self.conn.commit()
+        return cur.rowcount
+
+    def reset(self, keys):
+        """把这些请求重新置为 pending，开始新一轮扫描"""
+        now = time.time()
+        self.conn.executemany(
+            "UPDATE scans SET state = ?, taskid = NULL, updated = ? WHERE key = ?",
+            [(PENDING, now, key) for key in keys])
+        self.conn.commit()
+
+    def round_complete(self):
+        """当前这一轮是否已跑完（未被中断）"""
+        return self._meta("complete") == "1"
+
+    def begin_round(self, keys):
+        """开始新一轮：轮次加一，这些请求重新置为 pending，返回新轮次"""
+        self.round += 1
+        self._set_meta("round", self.round)
+        self._set_meta("complete", 0)
+        self.reset(keys)
+        return self.round
+
+    def complete_round(self):
+        """整轮跑完后调用，下次运行开始新一轮"""
+        self._set_meta("complete", 1)
+        self.conn.commit()
+
+    def counts(self):
+        """各状态的数量"""
+        result = {s: 0 for s in STATES}
+        for state, n in self.conn.execute("SELECT state, COUNT(*) FROM scans GROUP BY state"):
+            result[state] = n
+        return result
+
+    def entries(self, state):
+        """指定状态的 (target, taskid, updated) 列表"""
+        return self.conn.execute(
+            "SELECT target, taskid, updated FROM scans WHERE state = ? ORDER BY updated",
+            (state,)).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def print_status(path):
+    """打印日志中的进度，不触发任何扫描"""
+    path = Path(path)
+    if not path.exists():
+        print(f"{path} 不存在，尚未开始扫描")
+        return
+    journal = ScanJournal(path)
+    try:
+        counts = journal.counts()
+        total = sum(counts.values())
+        finished = sum(counts[s] for s in FINISHED)
+        print(f"日志: {path}")
+        print(f"第 {journal.round} 轮，" + ("已跑完" if journal.round_complete() else "未跑完（下次运行接着扫）"))
+        print(f"总计 {total} 条，已完成 {finished} 条，剩余 {total - finished} 条")
+        for state in STATES:
+            print(f"  {state:<8} {counts[state]}")
+        for target, taskid, updated in journal.entries(RUNNING):
+            since = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(updated))
+            print(f"  [running] {target} 任务ID: {taskid} 开始于 {since}")
+    finally:
+        journal.close()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+scan_timing.py
+batch_sqlmapapi.py / batch_sqlmap.py 共用的分阶段耗时统计
+1. 每个阶段（new_task/start_scan/wait_task/get_data/delete_task/restart ...）用 monotonic 时钟计时
+2. 按请求记录各阶段耗时和结果（done/timeout/error）
+3. 运行中估算剩余时间，结束时输出各阶段 p50/p90/p99 及超时、异常次数
+4. 可导出 CSV（每条请求一行）/ JSON（汇总 + 明细）
+用法：
+    timer = PhaseTimer()
+    timer.begin(url)
+    with timer.phase("new_task"):
+        ...
+    timer.end("done")
+    print(timer.summary())
+    timer.export("scan_timing.csv")
+"""
+
+import csv
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(values, pct):
+    """最近秩法百分位，values 需已排序"""
+    if not values:
+        return 0.0
+    rank = max(1, -(-pct * len(values) // 100))
+    return values[min(rank, len(values)) - 1]
+
+
+def format_seconds(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.samples = {}       # 阶段 -> [耗时]
+        self.records = []       # 每条请求: {"target", "outcome", "total", "phases"}
+        self.current = None
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        """记录一次阶段耗时（可由后台线程调用，如 sqlmapapi 重启）"""
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+            if self.current is not None:
+                phases = self.current["phases"]
+                phases[name] = phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - start)
+
+    def begin(self, target):
+        self.current = {"target": target, "outcome": None, "phases": {},
+                        "_start": time.monotonic()}
+
+    def end(self, outcome):
+        record, self.current = self.current, None
+        if record is None:
+            return
+        record["outcome"] = outcome
+        record["total"] = time.monotonic() - record.pop("_start")
+        with self._lock:
+            self.records.append(record)
+            self.samples.setdefault("total", []).append(record["total"])
+
+    def outcomes(self):
+        counts = {}
+        for record in self.records:
+            counts[record["outcome"]] = counts.get(record["outcome"], 0) + 1
+        return counts
+
+    def eta(self, remaining):
+        """按已完成请求的平均耗时估算剩余时间（秒），尚无数据时返回 None"""
+        if not self.records:
+            return None
+        return sum(r["total"] for r in self.records) / len(self.records) * remaining
+
+    def stats(self):
+        result = {}
+        with self._lock:
+            items = [(name, sorted(values)) for name, values in self.samples.items()]
+        for name, values in items:
+            stat = {"count": len(values), "sum": sum(values), "max": values[-1]}
+            for pct in PERCENTILES:
+                stat[f"p{pct}"] = percentile(values, pct)
+            result[name] = stat
+        return result
+
+    def summary(self):
+        lines = [f"总耗时 {format_seconds(time.monotonic() - self.started)}，"
+                 f"共 {len(self.records)} 条请求"]
+        outcomes = self.outcomes()
+        if outcomes:
+            lines.append("结果: " + "，".join(f"{k} {v}" for k, v in sorted(outcomes.items())))
+        header = f"{'阶段':<12}{'次数':>6}{'合计(s)':>10}" + \
+                 "".join(f"{'p' + str(p) + '(s)':>9}" for p in PERCENTILES) + f"{'max(s)':>9}"
+        lines.append(header)
+        for name, stat in sorted(self.stats().items(), key=lambda kv: -kv[1]["sum"]):
+            lines.append(f"{name:<12}{stat['count']:>6}{stat['sum']:>10.1f}" +
+                         "".join(f"{stat['p' + str(p)]:>9.2f}" for p in PERCENTILES) +
+                         f"{stat['max']:>9.2f}")
+        return "\n".join(lines)
+
+    def export(self, path):
+        """按后缀导出: .csv 每条请求一行，其它为 JSON"""
+        path = Path(path)
+        if path.suffix.lower() == ".csv":
+            phases = sorted({name for r in self.records for name in r["phases"]})
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["target", "outcome", "total"] + phases)
+                for r in self.records:
+                    writer.writerow([r["target"], r["outcome"], f"{r['total']:.3f}"] +
+                                    [f"{r['phases'].get(name, 0.0):.3f}" for name in phases])
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"outcomes": self.outcomes(), "phases": self.stats(),
+                           "records": self.records}, f, ensure_ascii=False, indent=2)
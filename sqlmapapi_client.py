@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+sqlmapapi_client.py
+batch_sqlmapapi.py / batch_sqlmap.py 访问本地 sqlmapapi 的公共部分
+1. make_session: 复用连接的 requests.Session（keep-alive 连接池）
+2. poll_intervals: 自适应轮询间隔，开始时快速轮询，之后按倍数退避直到上限
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POLL_MIN = 0.5      # 首次轮询间隔（秒）
+POLL_MAX = 15       # 轮询间隔上限（秒）
+POLL_FACTOR = 1.5   # 每次轮询后间隔放大的倍数
+POOL_SIZE = 4
+
+
+def make_session(pool_size=POOL_SIZE):
+    """创建到本地 sqlmapapi 的长连接会话"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    # 本地 API 不走系统代理，也省去每次请求读取环境变量
+    session.trust_env = False
+    return session
+
+
+def poll_intervals(first=POLL_MIN, ceiling=POLL_MAX, factor=POLL_FACTOR):
+    """无限生成轮询间隔: first, first*factor, ... 不超过 ceiling"""
+    interval = first
+    while True:
+        yield interval
+        interval = min(interval * factor, ceiling)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+sqlmapapi_supervisor.py
+batch_sqlmapapi.py / batch_sqlmap.py 共用的 sqlmapapi 守护
+1. 端口一旦可以连接即视为就绪，不再盲等固定秒数
+2. 后台线程阻塞在 proc.wait() 上监视进程（Windows 下没有 SIGCHLD），不做 HTTP 探测
+3. 进程退出后在后台自动重启，调用方只有在 API 确实不可用时才会在 wait_ready() 上阻塞
+4. 端口上已有 sqlmapapi 在运行时直接复用，只做廉价的 TCP 连接检查，挂掉后改为自己拉起
+用法：
+    api = ApiSupervisor(cmd, "127.0.0.1", 8775, cwd=sqlmap_dir, log=print)
+    if not api.start(): ...
+    api.wait_ready(60)
+    api.restart()      # API 无响应时强制重启
+    api.stop()
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import threading
+import time
+
+CONNECT_TIMEOUT = 0.5       # 端口探测的连接超时（秒）
+READY_POLL = 0.1            # 启动时端口探测间隔（秒）
+EXTERNAL_CHECK = 5          # 复用外部 sqlmapapi 时的端口检查间隔（秒）
+RESTART_BACKOFF_MAX = 30    # 连续重启失败时的最大等待（秒）
+
+
+def port_open(host, port, timeout=CONNECT_TIMEOUT):
+    """端口是否可以建立 TCP 连接"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def kill_proc(proc):
+    if proc and proc.poll() is None:
+        proc.send_signal(signal.CTRL_BREAK_EVENT if os.name == 'nt' else signal.SIGTERM)
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+class ApiSupervisor:
+    def __init__(self, cmd, host, port, cwd=None, start_timeout=30, log=print, on_restart=None):
+        self.cmd = cmd
+        self.host = host
+        self.port = port
+        self.cwd = cwd
+        self.start_timeout = start_timeout
+        self.log = log
+        self.on_restart = on_restart    # 回调: 每次重启完成后传入不可用的秒数
+        self.proc = None
+        self.restarts = 0
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+        self._monitor = None
+
+    # ---------- 对外接口 ----------
+    def start(self):
+        """启动（或复用已在运行的）sqlmapapi，返回是否就绪"""
+        if port_open(self.host, self.port):
+            self.log(f"{self.host}:{self.port} 已有 sqlmapapi 在运行，直接复用")
+            self._ready.set()
+        elif not self._launch():
+            self.log("sqlmapapi 启动失败")
+            return False
+        self._monitor = threading.Thread(target=self._watch, name="sqlmapapi-supervisor", daemon=True)
+        self._monitor.start()
+        return True
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout=None):
+        """API 可用时立即返回 True；不可用时阻塞等待后台重启完成"""
+        return self._ready.wait(timeout)
+
+    def restart(self):
+        """API 无响应但进程仍在时强制重启，实际重启由后台线程完成"""
+        self._ready.clear()
+        if self.proc is None:
+            # 复用的外部进程无法 kill，由后台线程重新检查端口，端口关闭后拉起自己的进程
+            return
+        self.log("检测到 sqlmapapi 异常，准备重启...")
+        kill_proc(self.proc)
+
+    def stop(self):
+        self._stopping.set()
+        self._ready.clear()
+        kill_proc(self.proc)
+        if self._monitor:
+            self._monitor.join(timeout=5)
+
+    # ---------- 内部实现 ----------
+    def _launch(self):
+        """拉起新进程并等待端口可连接"""
+        proc = subprocess.Popen(self.cmd, cwd=self.cwd,
+                                stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL,
+                                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0)
+        deadline = time.monotonic() + self.start_timeout
+        while time.monotonic() < deadline and not self._stopping.is_set():
+            if proc.poll() is not None:
+                break
+            if port_open(self.host, self.port):
+                self.proc = proc
+                self._ready.set()
+                self.log("sqlmapapi 已就绪")
+                return True
+            time.sleep(READY_POLL)
+        kill_proc(proc)
+        return False
+
+    def _watch(self):
+        while not self._stopping.is_set():
+            if self.proc is None:
+                # 复用外部 sqlmapapi: 只能定期检查端口
+                if self._stopping.wait(EXTERNAL_CHECK):
+                    return
+                if port_open(self.host, self.port):
+                    self._ready.set()
+                    continue
+                self.log("外部 sqlmapapi 已不可用，改为自行启动")
+            else:
+                self.proc.wait()
+                if self._stopping.is_set():
+                    return
+                self.log(f"sqlmapapi 进程已退出（返回码 {self.proc.returncode}），后台重启中...")
+            self._ready.clear()
+            self.restarts += 1
+            down_since = time.monotonic()
+            backoff = 1
+            while not self._stopping.is_set() and not self._launch():
+                self.log(f"sqlmapapi 重启失败，{backoff} 秒后重试")
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, RESTART_BACKOFF_MAX)
+            if self.on_restart and self._ready.is_set():
+                self.on_restart(time.monotonic() - down_since)